@@ -46,21 +46,58 @@ IN_1 = \
 def problem_1_a(lines):
     '''Find the two entries that sum to 2020; what do you get if you multiply them together?
     514579'''
-    import itertools
+    def get_pair(numbers, target):
+        seen = set()
+        for number in numbers:
+            if target - number in seen:
+                return target - number, number
+            seen.add(number)
+
     numbers = [int(line) for line in lines]
-    for l, r in itertools.combinations(numbers, 2):
-        if l + r == 2020:
-            return l * r
+    pair = get_pair(numbers, 2020)
+    if pair is None:
+        return None
+    l, r = pair
+    return l * r
 
 
 def problem_1_b(lines):
     '''In your expense report, what is the product of the three entries that sum to 2020?
     241861950'''
-    import itertools
+    import bisect, functools, operator as op
+
+    def get_entries(numbers, target, k):
+        numbers = sorted(numbers)
+        return get_k_sum(numbers, 0, target, k)
+
+    def get_k_sum(numbers, start, target, k):
+        if k == 1:
+            i = bisect.bisect_left(numbers, target, start)
+            return (target,) if i < len(numbers) and numbers[i] == target else None
+        if k == 2:
+            return get_pair(numbers, start, target)
+        for i in range(start, len(numbers)-k+1):
+            if i > start and numbers[i] == numbers[i-1]:
+                continue
+            if numbers[i] * k > target:
+                break
+            rest = get_k_sum(numbers, i+1, target-numbers[i], k-1)
+            if rest:
+                return (numbers[i],) + rest
+
+    def get_pair(numbers, start, target):
+        l, r = start, len(numbers) - 1
+        while l < r:
+            sum_ = numbers[l] + numbers[r]
+            if sum_ == target:
+                return numbers[l], numbers[r]
+            l, r = (l+1, r) if sum_ < target else (l, r-1)
+
     numbers = [int(line) for line in lines]
-    for a, b, c in itertools.combinations(numbers, 3):
-        if a + b + c == 2020:
-            return a * b * c
+    entries = get_entries(numbers, 2020, 3)
+    if entries is None:
+        return None
+    return functools.reduce(op.mul, entries)
 
 
 ###
@@ -75,20 +112,38 @@ IN_2 = \
 
 def problem_2_a(lines):
     '''How many passwords are valid according to their policies? 2'''
-    import re
-    def is_valid(line):
-        min_, max_, letter, password = re.match('^(\d+)-(\d+) (\w): (\w+)$', line).groups()
-        return int(min_) <= password.count(letter) <= int(max_)
-    return sum(is_valid(line) for line in lines)
+    def get_records(lines):
+        for line in lines:
+            range_, letter, password = line.split()
+            i_1, i_2 = range_.split('-')
+            yield int(i_1), int(i_2), letter[0], password
+
+    def get_counts(records):
+        n_valid_a, n_valid_b = 0, 0
+        for i_1, i_2, letter, password in records:
+            n_valid_a += i_1 <= password.count(letter) <= i_2
+            n_valid_b += (password[i_1-1] == letter) != (password[i_2-1] == letter)
+        return n_valid_a, n_valid_b
+
+    return get_counts(get_records(lines))[0]
 
 
 def problem_2_b(lines):
     '''How many passwords are valid according to the new interpretation of the policies? 1'''
-    import re
-    def is_valid(line):
-        i_1, i_2, letter, password = re.match('^(\d+)-(\d+) (\w): (\w+)$', line).groups()
-        return (password[int(i_1)-1] == letter) + (password[int(i_2)-1] == letter) == 1
-    return sum(is_valid(line) for line in lines)
+    def get_records(lines):
+        for line in lines:
+            range_, letter, password = line.split()
+            i_1, i_2 = range_.split('-')
+            yield int(i_1), int(i_2), letter[0], password
+
+    def get_counts(records):
+        n_valid_a, n_valid_b = 0, 0
+        for i_1, i_2, letter, password in records:
+            n_valid_a += i_1 <= password.count(letter) <= i_2
+            n_valid_b += (password[i_1-1] == letter) != (password[i_2-1] == letter)
+        return n_valid_a, n_valid_b
+
+    return get_counts(get_records(lines))[1]
 
 
 ###
@@ -112,27 +167,40 @@ IN_3 = \
 def problem_3_a(lines):
     '''Starting at the top-left corner of your map and following a slope of right 3 and down 1,
     how many trees would you encounter? 7'''
-    import collections
-    P = collections.namedtuple('P', 'x y')
-    positions = (P(x=y*3, y=y) for y in range(len(lines)))
-    is_tree = lambda p: lines[p.y][p.x % len(lines[0])] == '#'
-    return sum(is_tree(p) for p in positions)
+    def get_map(lines):
+        table = bytes.maketrans(b'.#', b'\0\1')
+        return [line.strip().encode().translate(table) for line in lines]
+
+    def count_trees(map_, slopes):
+        width, counts = len(map_[0]), [0] * len(slopes)
+        for y, row in enumerate(map_):
+            for i, (dx, dy) in enumerate(slopes):
+                if y % dy == 0:
+                    counts[i] += row[y // dy * dx % width]
+        return counts
+
+    return count_trees(get_map(lines), [(3, 1)])[0]
 
 
 def problem_3_b(lines):
     '''What do you get if you multiply together the number of trees encountered on each of the
     listed slopes? 336'''
-    import collections, functools, itertools, operator as op
-    P = collections.namedtuple('P', 'x y')
+    import functools, operator as op
 
-    def get_positions(slope):
-        x_generator = itertools.count(start=0, step=slope.x)
-        return (P(next(x_generator), y) for y in range(0, len(lines), slope.y))
+    def get_map(lines):
+        table = bytes.maketrans(b'.#', b'\0\1')
+        return [line.strip().encode().translate(table) for line in lines]
 
-    is_tree = lambda p: lines[p.y][p.x % len(lines[0])] == '#'
-    count_trees = lambda slope: sum(is_tree(p) for p in get_positions(slope))
-    slopes = [P(x=1, y=1), P(x=3, y=1), P(x=5, y=1), P(x=7, y=1), P(x=1, y=2)]
-    return functools.reduce(op.mul, (count_trees(slope) for slope in slopes))
+    def count_trees(map_, slopes):
+        width, counts = len(map_[0]), [0] * len(slopes)
+        for y, row in enumerate(map_):
+            for i, (dx, dy) in enumerate(slopes):
+                if y % dy == 0:
+                    counts[i] += row[y // dy * dx % width]
+        return counts
+
+    slopes = [(1, 1), (3, 1), (5, 1), (7, 1), (1, 2)]
+    return functools.reduce(op.mul, count_trees(get_map(lines), slopes))
 
 
 ###
@@ -157,36 +225,58 @@ iyr:2011 ecl:brn hgt:59in'''
 
 def problem_4_a(lines):
     '''In your batch file, how many passports are valid? 2'''
-    passports = ' '.join(lines).split('  ')
-    get_keys = lambda passport: {item.split(':')[0] for item in passport.split()}
-    is_valid = lambda passport: len(get_keys(passport) - {'cid'}) == 7
-    return sum(is_valid(p) for p in passports)
+    def get_passports(lines):
+        passport = {}
+        for line in lines:
+            if not line.strip():
+                if passport:
+                    yield passport
+                passport = {}
+                continue
+            passport.update(item.split(':', 1) for item in line.split())
+        if passport:
+            yield passport
+
+    is_valid = lambda passport: len(passport.keys() - {'cid'}) == 7
+    return sum(is_valid(p) for p in get_passports(lines))
 
 
 def problem_4_b(lines):
     '''In your batch file, how many passports are valid? 2'''
     import re
 
-    def is_passport_valid(passport):
-        return sum(is_field_valid(*item.split(':')) for item in passport.split()) == 7
+    def get_passports(lines):
+        passport = {}
+        for line in lines:
+            if not line.strip():
+                if passport:
+                    yield passport
+                passport = {}
+                continue
+            passport.update(item.split(':', 1) for item in line.split())
+        if passport:
+            yield passport
+
+    RULES = dict(
+        byr=(re.compile('\d{4}'), lambda v: 1920 <= int(v) <= 2002),
+        iyr=(re.compile('\d{4}'), lambda v: 2010 <= int(v) <= 2020),
+        eyr=(re.compile('\d{4}'), lambda v: 2020 <= int(v) <= 2030),
+        hgt=(re.compile('\d+(cm|in)'),
+             lambda v: 150 <= int(v[:-2]) <= 193 if v[-2:] == 'cm' else
+                       59 <= int(v[:-2]) <= 76),
+        hcl=(re.compile('#[0-9a-f]{6}'), lambda v: True),
+        ecl=(re.compile('amb|blu|brn|gry|grn|hzl|oth'), lambda v: True),
+        pid=(re.compile('\d{9}'), lambda v: True)
+    )
 
     def is_field_valid(key, value):
-        RULES = dict(
-            byr=lambda v: 1920 <= int(v) <= 2002,
-            iyr=lambda v: 2010 <= int(v) <=  2020,
-            eyr=lambda v: 2020 <= int(v) <=  2030,
-            hgt=lambda v: 150 <= int(v[:-2]) <= 193 if 'cm' in v else 59 <= int(v[:-2]) <= 76,
-            hcl=lambda v: re.match('#[0-9a-f]{6}$', v) != None,
-            ecl=lambda v: v in 'amb blu brn gry grn hzl oth'.split(),
-            pid=lambda v: re.match('\d{9}$', v) != None
-        )
-        try:
-            return RULES[key](value)
-        except Exception:
+        if key not in RULES:
             return False
+        pattern, is_in_range = RULES[key]
+        return pattern.fullmatch(value) is not None and is_in_range(value)
 
-    passports = ' '.join(lines).split('  ')
-    return sum(is_passport_valid(p) for p in passports)
+    is_valid = lambda passport: sum(is_field_valid(k, v) for k, v in passport.items()) == 7
+    return sum(is_valid(p) for p in get_passports(lines))
 
 
 ###
@@ -201,18 +291,30 @@ BBFFBBFRLL'''
 
 def problem_5_a(lines):
     '''What is the highest seat ID on a boarding pass? 820'''
-    get_bin = lambda code: ''.join('0' if ch in 'FL' else '1' for ch in code)
-    get_id  = lambda code: int(get_bin(code), 2)
-    return max(get_id(code) for code in lines)
+    def get_ids(lines):
+        table = str.maketrans('FBLR', '0101')
+        return (int(code.strip().translate(table), 2) for code in lines)
+
+    return max(get_ids(lines))
 
 
 def problem_5_b(lines):
     '''What is the ID of your seat? 819'''
-    get_bin   = lambda code: ''.join('0' if ch in 'FL' else '1' for ch in code)
-    get_id    = lambda code: int(get_bin(code), 2)
-    taken_ids = {get_id(code) for code in lines}
-    all_ids   = range(min(taken_ids), max(taken_ids)+1)
-    return (set(all_ids) - taken_ids).pop()
+    def get_ids(lines):
+        table = str.maketrans('FBLR', '0101')
+        return (int(code.strip().translate(table), 2) for code in lines)
+
+    def get_missing_ids(ids):
+        taken = bytearray()
+        for id_ in ids:
+            if id_ >= len(taken):
+                taken.extend(bytes(id_ + 1 - len(taken)))
+            taken[id_] = 1
+        first, last = taken.index(1), len(taken) - 1
+        return [i for i in range(first, last) if not taken[i]]
+
+    id_, = get_missing_ids(get_ids(lines))
+    return id_
 
 
 ###
@@ -240,18 +342,53 @@ b'''
 def problem_6_a(lines):
     '''For each group, count the number of questions to which anyone answered "yes". What is
     the sum of those counts? 11'''
-    groups = (set(group) - {' '} for group in ' '.join(lines).split('  '))
-    return sum(len(group) for group in groups)
+    import itertools
+
+    def get_totals(lines):
+        BITS = {chr(ord('a') + i): 1 << i for i in range(26)}
+        ALL = (1 << 26) - 1
+        anyone, everyone, total_anyone, total_everyone = 0, ALL, 0, 0
+        for line in itertools.chain(lines, ['']):
+            line = line.strip()
+            if not line:
+                if anyone:
+                    total_anyone += bin(anyone).count('1')
+                    total_everyone += bin(everyone).count('1')
+                anyone, everyone = 0, ALL
+                continue
+            answers = 0
+            for ch in line:
+                answers |= BITS[ch]
+            anyone, everyone = anyone | answers, everyone & answers
+        return total_anyone, total_everyone
+
+    return get_totals(lines)[0]
 
 
 def problem_6_b(lines):
     '''For each group, count the number of questions to which everyone answered "yes". What is
     the sum of those counts? 6'''
-    import functools, operator as op
-    groups             = ' '.join(lines).split('  ')
-    split_group        = lambda group: (set(a) for a in group.split(' '))
-    get_common_answers = lambda group: functools.reduce(op.and_, split_group(group))
-    return sum(len(get_common_answers(group)) for group in groups)
+    import itertools
+
+    def get_totals(lines):
+        BITS = {chr(ord('a') + i): 1 << i for i in range(26)}
+        ALL = (1 << 26) - 1
+        anyone, everyone, total_anyone, total_everyone = 0, ALL, 0, 0
+        for line in itertools.chain(lines, ['']):
+            line = line.strip()
+            if not line:
+                if anyone:
+                    total_anyone += bin(anyone).count('1')
+                    total_everyone += bin(everyone).count('1')
+                anyone, everyone = 0, ALL
+                continue
+            answers = 0
+            for ch in line:
+                answers |= BITS[ch]
+            anyone, everyone = anyone | answers, everyone & answers
+        return total_anyone, total_everyone
+
+    return get_totals(lines)[1]
 
 
 ###
@@ -272,43 +409,62 @@ dotted black bags contain no other bags.'''
 
 def problem_7_a(lines):
     '''How many bag colors can eventually contain at least one shiny gold bag? 4'''
-    import re
+    import collections, re
 
-    def parse_line(line):
-        container, contents = line.split(' bags contain ')
-        if contents == 'no other bags.':
-            return container, set()
-        get_color = lambda token: re.search('\d+ (.*) .*$', token).group(1) 
-        return container, {get_color(a) for a in contents.split(',')}
+    def get_containers(lines):
+        CONTENT = re.compile('\d+ (.+?) bags?')
+        out = collections.defaultdict(list)
+        for line in lines:
+            container, contents = line.split(' bags contain ')
+            for color in CONTENT.findall(contents):
+                out[color].append(container)
+        return out
+
+    def get_ancestors(containers, color):
+        out, queue = set(), [color]
+        for color in queue:
+            for container in containers.get(color, []):
+                if container not in out:
+                    out.add(container)
+                    queue.append(container)
+        return out
 
-    bags = dict(parse_line(line) for line in lines)
-    out = {k for k, v in bags.items() if 'shiny gold' in v}
-    while True:
-        new_colors = {k for k, v in bags.items() if out & v}
-        if new_colors <= out:
-            return len(out)
-        out |= new_colors
+    return len(get_ancestors(get_containers(lines), 'shiny gold'))
 
 
 def problem_7_b(lines):
     '''How many individual bags are required inside your single shiny gold bag? 32'''
-    import re
+    import collections, re
+    Graph = collections.namedtuple('Graph', 'contents containers order')
 
-    def parse_line(line):
-        container, contents = line.split(' bags contain ')
-        if contents == 'no other bags.':
-            return container, set()
-        get_number_and_color = lambda token: re.search('(\d+) (.*) .*$', token).groups()
-        return container, {get_number_and_color(a) for a in contents.split(',')}
+    def get_graph(lines):
+        CONTENT = re.compile('(\d+) (.+?) bags?')
+        contents, containers = {}, collections.defaultdict(list)
+        for line in lines:
+            container, rest = line.split(' bags contain ')
+            contents[container] = [(int(n), color) for n, color in CONTENT.findall(rest)]
+            for _, color in contents[container]:
+                contents.setdefault(color, [])
+                containers[color].append(container)
+        return Graph(contents, containers, get_order(contents, containers))
+
+    def get_order(contents, containers):
+        n_pending = {color: len(a) for color, a in contents.items()}
+        out = [color for color, n in n_pending.items() if n == 0]
+        for color in out:
+            for container in containers[color]:
+                n_pending[container] -= 1
+                if n_pending[container] == 0:
+                    out.append(container)
+        return out
 
-    def get_n_bags(color):
-        contents = bags[color]
-        if not contents:
-            return 1
-        return 1 + sum(int(n) * get_n_bags(color) for n, color in contents)
+    def get_n_bags_inside(graph):
+        out = {}
+        for color in graph.order:
+            out[color] = sum(n * (1 + out[a]) for n, a in graph.contents[color])
+        return out
 
-    bags = dict(parse_line(line) for line in lines)
-    return get_n_bags('shiny gold') - 1
+    return get_n_bags_inside(get_graph(lines))['shiny gold']
 
 
 ###
@@ -330,53 +486,97 @@ acc +6'''
 def problem_8_a(lines):
     '''Run your copy of the boot code. Immediately before any instruction is executed a second
     time, what value is in the accumulator? 5'''
-    OPERATIONS = dict(
-        acc=lambda pc, accumulator, argument: (pc+1, accumulator+int(argument)),
-        jmp=lambda pc, accumulator, argument: (pc+int(argument), accumulator),
-        nop=lambda pc, accumulator, argument: (pc+1, accumulator)
-    )
-    pc = 0
-    accumulator = 0
-    executed = set()
-    while pc not in executed:
-        executed.add(pc)
-        operation, argument = lines[pc].split()
-        pc, accumulator = OPERATIONS[operation](pc, accumulator, argument)
+    import array
+    ACC, JMP, NOP = range(3)
+
+    def compile_program(lines):
+        OPCODES = dict(acc=ACC, jmp=JMP, nop=NOP)
+        opcodes, arguments = array.array('B'), array.array('q')
+        for line in lines:
+            operation, argument = line.split()
+            opcodes.append(OPCODES[operation])
+            arguments.append(int(argument))
+        return opcodes, arguments
+
+    def run(opcodes, arguments, pc=0, accumulator=0, trace=None, max_steps=None):
+        executed = bytearray(len(opcodes))
+        for _ in range(len(opcodes) if max_steps is None else max_steps):
+            if not 0 <= pc < len(opcodes) or executed[pc]:
+                break
+            executed[pc] = 1
+            if trace:
+                trace(pc, accumulator)
+            if opcodes[pc] == JMP:
+                pc += arguments[pc]
+            else:
+                accumulator += arguments[pc] if opcodes[pc] == ACC else 0
+                pc += 1
+        return pc, accumulator
+
+    _, accumulator = run(*compile_program(lines))
     return accumulator
 
 
 def problem_8_b(lines):
     '''Fix the program so that it terminates normally by changing exactly one jmp (to nop) or 
     nop (to jmp). What is the value of the accumulator after the program terminates? 8'''
+    import array
+    ACC, JMP, NOP = range(3)
+    FLIPPED = {JMP: NOP, NOP: JMP}
+
     def main():
-        for program in program_generator():
-            result = run(program)
-            if result is not None:
-                return result
-
-    def program_generator():
-        for i, line in enumerate(lines):
-            if line.startswith('acc'):
-                continue
-            line = line.replace('jmp', 'nop') if 'jmp' in line else line.replace('nop', 'jmp')
-            yield lines[:i] + [line] + lines[i+1:]
-
-    def run(program):
-        OPERATIONS = dict(
-            acc=lambda pc, accumulator, argument: (pc+1, accumulator+int(argument)),
-            jmp=lambda pc, accumulator, argument: (pc+int(argument), accumulator),
-            nop=lambda pc, accumulator, argument: (pc+1, accumulator)
-        )
-        pc = 0
-        accumulator = 0
-        executed = set()
-        while pc not in executed:
-            executed.add(pc)
-            operation, argument = program[pc].split()
-            pc, accumulator = OPERATIONS[operation](pc, accumulator, argument)
-            if pc == len(program):
-                return accumulator
-        return None
+        opcodes, arguments = compile_program(lines)
+        terminating = get_terminating(opcodes, arguments)
+        path = []
+        run(opcodes, arguments, trace=lambda pc, accumulator: path.append((pc, accumulator)))
+        for pc, accumulator in path:
+            if opcodes[pc] in FLIPPED:
+                next_pc = get_next_pc(pc, FLIPPED[opcodes[pc]], arguments[pc])
+                if next_pc in terminating:
+                    _, accumulator = run(opcodes, arguments, next_pc, accumulator)
+                    return accumulator
+
+    def compile_program(lines):
+        OPCODES = dict(acc=ACC, jmp=JMP, nop=NOP)
+        opcodes, arguments = array.array('B'), array.array('q')
+        for line in lines:
+            operation, argument = line.split()
+            opcodes.append(OPCODES[operation])
+            arguments.append(int(argument))
+        return opcodes, arguments
+
+    def run(opcodes, arguments, pc=0, accumulator=0, trace=None, max_steps=None):
+        executed = bytearray(len(opcodes))
+        for _ in range(len(opcodes) if max_steps is None else max_steps):
+            if not 0 <= pc < len(opcodes) or executed[pc]:
+                break
+            executed[pc] = 1
+            if trace:
+                trace(pc, accumulator)
+            if opcodes[pc] == JMP:
+                pc += arguments[pc]
+            else:
+                accumulator += arguments[pc] if opcodes[pc] == ACC else 0
+                pc += 1
+        return pc, accumulator
+
+    def get_next_pc(pc, opcode, argument):
+        return pc + argument if opcode == JMP else pc + 1
+
+    def get_terminating(opcodes, arguments):
+        TERMINATES, LOOPS, VISITING = 1, 2, 3
+        out = bytearray(len(opcodes) + 1)
+        out[-1] = TERMINATES
+        for start in range(len(opcodes)):
+            path, pc = [], start
+            while 0 <= pc < len(out) and not out[pc]:
+                out[pc] = VISITING
+                path.append(pc)
+                pc = get_next_pc(pc, opcodes[pc], arguments[pc])
+            status = out[pc] if 0 <= pc < len(out) and out[pc] != VISITING else LOOPS
+            for pc in path:
+                out[pc] = status
+        return {pc for pc, status in enumerate(out) if status == TERMINATES}
 
     return main()
 
@@ -419,28 +619,67 @@ def problem_9_a(lines):
     '''The first step of attacking the weakness in the XMAS data is to find the first number in
     the list (after the preamble) which is not the sum of two of the 25 numbers before it. What
     is the first number that does not have this property? 65'''
-    import itertools
+    import collections
 
-    def is_sum(candidate, numbers):
-        return any(a + b == candidate for a, b in itertools.combinations(numbers, 2))
+    def get_invalid_number(numbers, preamble):
+        window, counter = collections.deque(), collections.Counter()
+        for number in numbers:
+            if len(window) == preamble and not is_sum(number, counter):
+                return number
+            window.append(number)
+            counter[number] += 1
+            if len(window) > preamble:
+                removed = window.popleft()
+                counter[removed] -= 1
+                if not counter[removed]:
+                    del counter[removed]
 
-    numbers = [int(line) for line in lines]
-    for i in range(25, len(numbers)):
-        if not is_sum(numbers[i], numbers[i-25:i]):
-            return numbers[i]
+    def is_sum(candidate, counter):
+        return any(candidate-a in counter and (candidate-a != a or counter[a] > 1)
+                       for a in counter)
+
+    return get_invalid_number((int(line) for line in lines), 25)
 
 
 def problem_9_b(lines):
     '''What is the encryption weakness in your XMAS-encrypted list of numbers? 21'''
-    invalid_number = problem_9_a(lines)
+    import collections
+
+    def get_invalid_number(numbers, preamble):
+        window, counter = collections.deque(), collections.Counter()
+        for number in numbers:
+            if len(window) == preamble and not is_sum(number, counter):
+                return number
+            window.append(number)
+            counter[number] += 1
+            if len(window) > preamble:
+                removed = window.popleft()
+                counter[removed] -= 1
+                if not counter[removed]:
+                    del counter[removed]
+
+    def is_sum(candidate, counter):
+        return any(candidate-a in counter and (candidate-a != a or counter[a] > 1)
+                       for a in counter)
+
+    def get_range(numbers, target):
+        start, sum_ = 0, 0
+        for end, number in enumerate(numbers, 1):
+            sum_ += number
+            while sum_ > target:
+                sum_ -= numbers[start]
+                start += 1
+            if sum_ == target and end - start >= 2:
+                return numbers[start:end]
+
     numbers = [int(line) for line in lines]
-    for i in range(len(numbers)):
-        for j in range(i+2, len(numbers)):
-            sum_ = sum(numbers[i:j])
-            if sum_ == invalid_number:
-                return min(numbers[i:j]) + max(numbers[i:j])
-            elif sum_ > invalid_number:
-                break
+    invalid_number = get_invalid_number(numbers, 25)
+    if invalid_number is None:
+        return None
+    range_ = get_range(numbers, invalid_number)
+    if range_ is None:
+        return None
+    return min(range_) + max(range_)
 
 
 ###
@@ -492,13 +731,17 @@ def problem_10_a(lines):
 def problem_10_b(lines):
     '''What is the total number of distinct ways you can arrange the adapters to connect the 
     charging outlet to your device? 19208'''
-    import functools, operator as op
-    numbers = sorted(int(a) for a in lines)
-    numbers = [0] + numbers + [numbers[-1]+3]
-    deltas = [b-a for a, b in zip(numbers, numbers[1:])]
-    d = ''.join(str(a) for a in deltas)
-    dd = [[1, 2, 4, 7, 13, 23][len(a)-1] for a in d.split('3') if a]
-    return functools.reduce(op.mul, dd)
+    import collections
+
+    def count_arrangements(joltages):
+        window = collections.deque([(0, 1)])
+        for joltage in joltages:
+            while window and window[0][0] < joltage - 3:
+                window.popleft()
+            window.append((joltage, sum(n for _, n in window)))
+        return window[-1][1]
+
+    return count_arrangements(sorted(int(a) for a in lines))
 
 
 ###
@@ -521,30 +764,30 @@ L.LLLLL.LL'''
 def problem_11_a(lines):
     '''Simulate your seating area by applying the seating rules repeatedly until no seats
     change state. How many seats end up occupied? 37'''
-    import collections
-    P = collections.namedtuple('P', 'x y')
-
     def main():
-        layout = {P(x, y): ch for y, line in enumerate(lines) for x, ch in enumerate(line)}
+        width = len(lines[0]) + 2
+        seats, occupied = get_board(lines, width, 'L#'), get_board(lines, width, '#')
         while True:
-            new_layout = step(layout)
-            if new_layout == layout:
-                return list(layout.values()).count('#')
-            layout = new_layout
-
-    def step(layout):
-        out = dict(layout)
-        for p, ch in layout.items():
-            adjecent_chars = [layout.get(a) for a in get_adjecent_positions(p)]
-            if ch == 'L' and '#' not in adjecent_chars:
-                out[p] = '#'
-            elif ch == '#' and adjecent_chars.count('#') >= 4:
-                out[p] = 'L'
-        return out
-
-    def get_adjecent_positions(p):
-        DELTAS = [P(-1, -1), P(0, -1), P(1, -1), P(-1, 0), P(1, 0), P(-1, 1), P(0, 1), P(1, 1)]
-        return (P(p.x + dx, p.y + dy) for dx, dy in DELTAS)
+            new_occupied = step(seats, occupied, width)
+            if new_occupied == occupied:
+                return bin(occupied).count('1')
+            occupied = new_occupied
+
+    def get_board(lines, width, chars):
+        rows = ['.' * width] + [f'.{line}.' for line in lines] + ['.' * width]
+        table = {ord(ch): '1' if ch in chars else '0' for ch in '.L#'}
+        return int(''.join(rows)[::-1].translate(table), 2)
+
+    def step(seats, occupied, width):
+        OFFSETS = [-width-1, -width, -width+1, -1, 1, width-1, width, width+1]
+        counter = [0, 0, 0, 0]
+        for offset in OFFSETS:
+            carry = occupied >> offset if offset > 0 else occupied << -offset
+            for i, bit in enumerate(counter):
+                counter[i], carry = bit ^ carry, bit & carry
+        has_neighbours = counter[0] | counter[1] | counter[2] | counter[3]
+        crowded = counter[2] | counter[3]
+        return (seats & ~has_neighbours) | (occupied & ~crowded)
 
     return main()
 
@@ -552,34 +795,48 @@ def problem_11_a(lines):
 def problem_11_b(lines):
     '''Given the new visibility method and the rule change for occupied seats becoming empty, 
     once equilibrium is reached, how many seats end up occupied? 26'''
-    import collections
-    P = collections.namedtuple('P', 'x y')
-
-    layout = {P(x, y): ch for y, line in enumerate(lines) for x, ch in enumerate(line)}
+    DIRECTIONS = [(-1, -1), (0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1), (1, 1)]
 
     def main():
-        nonlocal layout
+        neighbours = get_visible_seats(lines)
+        occupied = bytearray(ch == '#' for line in lines for ch in line if ch in 'L#')
+        return simulate(neighbours, occupied)
+
+    def get_visible_seats(lines):
+        height, width = len(lines), len(lines[0])
+        ids, n_seats = [[-1] * width for _ in range(height)], 0
+        for y, line in enumerate(lines):
+            for x, ch in enumerate(line):
+                if ch in 'L#':
+                    ids[y][x], n_seats = n_seats, n_seats + 1
+        out = [[] for _ in range(n_seats)]
+        for dx, dy in DIRECTIONS:
+            visible = [[-1] * width for _ in range(height)]
+            for y in (range(height-1, -1, -1) if dy > 0 else range(height)):
+                for x in (range(width-1, -1, -1) if dx > 0 else range(width)):
+                    x_, y_ = x + dx, y + dy
+                    if not (0 <= x_ < width and 0 <= y_ < height):
+                        continue
+                    visible[y][x] = ids[y_][x_] if ids[y_][x_] != -1 else visible[y_][x_]
+                    if ids[y][x] != -1 and visible[y][x] != -1:
+                        out[ids[y][x]].append(visible[y][x])
+        return out
+
+    def simulate(neighbours, occupied):
+        counts = [sum(occupied[a] for a in seat_neighbours) for seat_neighbours in neighbours]
+        should_flip = lambda a: counts[a] >= 5 if occupied[a] else not counts[a]
+        frontier = range(len(neighbours))
         while True:
-            new_layout = {p: get_new_ch(p, ch) for p, ch in layout.items()}
-            if new_layout == layout:
-                return list(layout.values()).count('#')
-            layout = new_layout
-
-    def get_new_ch(p, ch):
-        DIRECTIONS = [P(-1, -1), P(0, -1), P(1, -1), P(-1, 0), P(1, 0), P(-1, 1), P(0, 1),
-                      P(1, 1)]
-        visible_chairs = [get_visible_chair(p, direction) for direction in DIRECTIONS]
-        if ch == 'L' and '#' not in visible_chairs:
-            return '#'
-        elif ch == '#' and visible_chairs.count('#') >= 5:
-            return 'L'
-        return ch
-
-    def get_visible_chair(p, direction):
-        while p in layout:
-            p = P(p.x + direction.x, p.y + direction.y)
-            if p in layout and layout[p] in 'L#':
-                return layout[p]
+            flipped = [a for a in frontier if should_flip(a)]
+            if not flipped:
+                return sum(occupied)
+            frontier = set()
+            for seat in flipped:
+                occupied[seat] ^= 1
+                delta = 1 if occupied[seat] else -1
+                for neighbour in neighbours[seat]:
+                    counts[neighbour] += delta
+                frontier.update(neighbours[seat])
 
     return main()
 
@@ -599,73 +856,75 @@ F11'''
 def problem_12_a(lines):
     '''Figure out where the navigation instructions lead. What is the Manhattan distance 
     between that location and the ship's starting position? 25'''
-    import collections, enum
-
-    P = collections.namedtuple('P', 'x y')
-    D = enum.Enum('D', 'n e s w')
-
-    def main():
-        p, d = P(0, 0), D.e
-        for line in lines:
-            p, d = step(p, d, line)
-        return abs(p.x) + abs(p.y)
-
-    def step(p, d, line):
-        DELTAS = {D.n: P(0, 1), D.e: P(1, 0), D.s: P(0, -1), D.w: P(-1, 0)}
-        ACTIONS = dict(
-            N=lambda p, d, arg: (P(p.x, p.y+arg), d),
-            S=lambda p, d, arg: (P(p.x, p.y-arg), d),
-            E=lambda p, d, arg: (P(p.x+arg, p.y), d),
-            W=lambda p, d, arg: (P(p.x-arg, p.y), d),
-            L=lambda p, d, arg: (p, turn(d, -arg)),
-            R=lambda p, d, arg: (p, turn(d, arg)),
-            F=lambda p, d, arg: (P(p.x + DELTAS[d].x*arg, p.y + DELTAS[d].y*arg), d)
-        )
-        action_id, arg = line[0], int(line[1:])
-        return ACTIONS[action_id](p, d, arg)
-
-    def turn(d, degrees):
-        directions = list(D)
-        index = (directions.index(d) + degrees//90) % len(directions)
-        return directions[index]
-
-    return main()
+    import functools
+    ZERO, ONE = (0, 0), (1, 0)
+    DIRECTIONS = dict(N=(0, 1), S=(0, -1), E=(1, 0), W=(-1, 0))
+    TURNS = [(1, 0), (0, 1), (-1, 0), (0, -1)]
+
+    # Transform (a, b, c, d) maps (position p, direction h) to (p + a*h + b, c*h + d).
+    # Coefficients are Gaussian integers kept as (x, y) pairs of ints, so they stay exact.
+    def get_transform(line):
+        action, arg = line[0], int(line[1:])
+        if action in DIRECTIONS:
+            return ZERO, mul((arg, 0), DIRECTIONS[action]), ONE, ZERO
+        if action == 'F':
+            return (arg, 0), ZERO, ONE, ZERO
+        return ZERO, ZERO, TURNS[arg // 90 * (1 if action == 'L' else -1) % 4], ZERO
+
+    def compose(transform_1, transform_2):
+        a_1, b_1, c_1, d_1 = transform_1
+        a_2, b_2, c_2, d_2 = transform_2
+        return add(a_1, mul(a_2, c_1)), add(add(b_1, mul(a_2, d_1)), b_2), mul(c_2, c_1), \
+            add(mul(c_2, d_1), d_2)
+
+    def add(u, v):
+        return u[0] + v[0], u[1] + v[1]
+
+    def mul(u, v):
+        return u[0]*v[0] - u[1]*v[1], u[0]*v[1] + u[1]*v[0]
+
+    transforms = (get_transform(line.strip()) for line in lines)
+    a, b, _, _ = functools.reduce(compose, transforms, (ZERO, ZERO, ONE, ZERO))
+    heading = ONE
+    x, y = add(mul(a, heading), b)
+    return abs(x) + abs(y)
 
 
 def problem_12_b(lines):
     '''Figure out where the navigation instructions actually lead. What is the Manhattan 
     distance between that location and the ship's starting position? 286'''
-    import collections
-    P = collections.namedtuple('P', 'x y')
-
-    def main():
-        p, waypoint = P(0, 0), P(10, 1)
-        for line in lines:
-            p, waypoint = step(p, waypoint, line)
-        return abs(p.x) + abs(p.y)
-
-    def step(p, waypoint, line):
-        ACTIONS = dict(
-            N=lambda p, waypoint, arg: (p, P(waypoint.x, waypoint.y+arg)),
-            S=lambda p, waypoint, arg: (p, P(waypoint.x, waypoint.y-arg)),
-            E=lambda p, waypoint, arg: (p, P(waypoint.x+arg, waypoint.y)),
-            W=lambda p, waypoint, arg: (p, P(waypoint.x-arg, waypoint.y)),
-            L=lambda p, waypoint, arg: (p, turn(waypoint, -arg)),
-            R=lambda p, waypoint, arg: (p, turn(waypoint, arg)),
-            F=lambda p, waypoint, arg: (P(p.x + waypoint.x*arg, p.y + waypoint.y*arg), 
-                                        waypoint)
-        )
-        action_id, arg = line[0], int(line[1:])
-        return ACTIONS[action_id](p, waypoint, arg)
-
-    def turn(waypoint, degrees):
-        degrees += 360 if degrees < 0 else 0
-        TURN = {90:  P(x=waypoint.y,  y=-waypoint.x),
-                180: P(x=-waypoint.x, y=-waypoint.y), 
-                270: P(x=-waypoint.y, y=waypoint.x)}
-        return TURN[degrees]
-
-    return main()
+    import functools
+    ZERO, ONE = (0, 0), (1, 0)
+    DIRECTIONS = dict(N=(0, 1), S=(0, -1), E=(1, 0), W=(-1, 0))
+    TURNS = [(1, 0), (0, 1), (-1, 0), (0, -1)]
+
+    # Transform (a, b, c, d) maps (position p, direction h) to (p + a*h + b, c*h + d).
+    # Coefficients are Gaussian integers kept as (x, y) pairs of ints, so they stay exact.
+    def get_transform(line):
+        action, arg = line[0], int(line[1:])
+        if action in DIRECTIONS:
+            return ZERO, ZERO, ONE, mul((arg, 0), DIRECTIONS[action])
+        if action == 'F':
+            return (arg, 0), ZERO, ONE, ZERO
+        return ZERO, ZERO, TURNS[arg // 90 * (1 if action == 'L' else -1) % 4], ZERO
+
+    def compose(transform_1, transform_2):
+        a_1, b_1, c_1, d_1 = transform_1
+        a_2, b_2, c_2, d_2 = transform_2
+        return add(a_1, mul(a_2, c_1)), add(add(b_1, mul(a_2, d_1)), b_2), mul(c_2, c_1), \
+            add(mul(c_2, d_1), d_2)
+
+    def add(u, v):
+        return u[0] + v[0], u[1] + v[1]
+
+    def mul(u, v):
+        return u[0]*v[0] - u[1]*v[1], u[0]*v[1] + u[1]*v[0]
+
+    transforms = (get_transform(line.strip()) for line in lines)
+    a, b, _, _ = functools.reduce(compose, transforms, (ZERO, ZERO, ONE, ZERO))
+    waypoint = (10, 1)
+    x, y = add(mul(a, waypoint), b)
+    return abs(x) + abs(y)
 
 
 ###
@@ -680,28 +939,41 @@ IN_13 = \
 def problem_13_a(lines):
     '''What is the ID of the earliest bus you can take to the airport multiplied by the number
     of minutes you'll need to wait for that bus? 295'''
-    import itertools
+    def get_earliest_buses(stamps, ids):
+        return [min((-stamp % id_, id_) for id_ in ids) for stamp in stamps]
+
     stamp = int(lines[0])
     ids = [int(a) for a in lines[1].split(',') if a != 'x']
-    get_departures = lambda stamp, id_: range(0, stamp+id_, id_)
-    timetable = [get_departures(stamp, id_) for id_ in ids]
-    departure = min(a for a in itertools.chain.from_iterable(timetable) if a >= stamp)
-    id_ = [a for a in ids if departure % a == 0][0]
-    return id_ * (departure - stamp)
+    [(wait, id_)] = get_earliest_buses([stamp], ids)
+    return id_ * wait
 
 
 def problem_13_b(lines):
     '''What is the earliest timestamp such that all of the listed bus IDs depart at offsets 
     matching their positions in the list? 1068781'''
+    def solve(congruences):
+        remainder, modulus = 0, 1
+        for r, m in congruences:
+            gcd, x, _ = get_extended_gcd(modulus, m)
+            if (r - remainder) % gcd != 0:
+                return None
+            step = (r - remainder) // gcd * x % (m // gcd)
+            remainder, modulus = remainder + step * modulus, modulus // gcd * m
+            remainder %= modulus
+        return remainder
+
+    def get_extended_gcd(a, b):
+        x, x_next, y, y_next = 1, 0, 0, 1
+        while b:
+            q = a // b
+            a, b = b, a - q*b
+            x, x_next = x_next, x - q*x_next
+            y, y_next = y_next, y - q*y_next
+        return a, x, y
+
     buses = [(offset, int(id_)) for offset, id_ in enumerate(lines[1].split(','))
                 if id_ != 'x']
-    stamp = 0
-    least_common_multiple = 1
-    for offset, id_ in buses:
-        while (stamp + offset) % id_ != 0:
-            stamp += least_common_multiple
-        least_common_multiple *= id_
-    return stamp
+    return solve((-offset % id_, id_) for offset, id_ in buses)
 
 
 ###
@@ -718,45 +990,62 @@ mem[26] = 1'''
 def problem_14_a(lines):
     '''Execute the initialization program. What is the sum of all values left in memory after 
     it completes? 51'''
-    import re
+    FLOATING = str.maketrans('01X', '001')
+
+    def parse_mask(mask):
+        return int(mask.replace('X', '0'), 2), int(mask.translate(FLOATING), 2)
 
-    def get_word(val, mask):
-        bin_val = bin(int(val))[2:]
-        bin_val_padded = '0' * (len(mask)-len(bin_val)) + bin_val
-        return ''.join(a if m == 'X' else m for a, m in zip(bin_val_padded, mask))
+    def parse_write(line):
+        address, value = line.split(' = ')
+        return int(address[4:-1]), int(value)
 
-    mem = {}
+    mem, ones, floating = {}, 0, 0
     for line in lines:
         if line.startswith('mask'):
-            _, mask = line.split(' = ')
+            ones, floating = parse_mask(line.split(' = ')[1])
             continue
-        addr, val = re.search('\[(\d+)\] = (\d+)', line).groups()
-        mem[addr] = get_word(val, mask)
-    return sum(int(a, 2) for a in mem.values())
+        address, value = parse_write(line)
+        mem[address] = value & floating | ones
+    return sum(mem.values())
 
 
 def problem_14_b(lines):
     '''Execute the initialization program using an emulator for a version 2 decoder chip. What
     is the sum of all values left in memory after it completes? 208'''
-    import itertools, re
+    import collections
+    FLOATING = str.maketrans('01X', '001')
+
+    def parse_mask(mask):
+        return int(mask.replace('X', '0'), 2), int(mask.translate(FLOATING), 2)
 
-    def address_generator(addr, mask):
-        bin_addr = bin(int(addr))[2:]
-        bin_addr_padded = '0' * (len(mask)-len(bin_addr)) + bin_addr
-        addr_template = ''.join(a if m == '0' else m for a, m in zip(bin_addr_padded, mask))
-        for floating_bits in itertools.product('01', repeat=addr_template.count('X')):
-            floating_bits = iter(floating_bits)
-            yield ''.join(next(floating_bits) if ch == 'X' else ch for ch in addr_template)
+    def parse_write(line):
+        address, value = line.split(' = ')
+        return int(address[4:-1]), int(value)
 
-    mem = {}
+    def intersect(pattern, other):
+        (base, floating), (other_base, other_floating) = pattern, other
+        if (base ^ other_base) & ~(floating | other_floating):
+            return None
+        floating &= other_floating
+        return (base | other_base) & ~floating, floating
+
+    weights, ones, floating = collections.Counter(), 0, 0
     for line in lines:
         if line.startswith('mask'):
-            _, mask = line.split(' = ')
+            ones, floating = parse_mask(line.split(' = ')[1])
             continue
-        addr, val = re.search('\[(\d+)\] = (\d+)', line).groups()
-        for address in address_generator(addr, mask):
-            mem[address] = val
-    return sum(int(a) for a in mem.values())
+        address, value = parse_write(line)
+        pattern = ((address | ones) & ~floating, floating)
+        updates = collections.Counter({pattern: value})
+        for other, weight in weights.items():
+            intersection = intersect(pattern, other)
+            if intersection:
+                updates[intersection] -= weight
+        for pattern, weight in updates.items():
+            weights[pattern] += weight
+            if not weights[pattern]:
+                del weights[pattern]
+    return sum(weight << bin(floating).count('1') for (_, floating), weight in weights.items())
 
 
 ###
@@ -769,23 +1058,56 @@ IN_15 = \
 
 def problem_15_a(lines):
     '''Given your starting numbers, what will be the 2020th number spoken? 436'''
-    *record, last_spoken = [int(a) for a in lines[0].split(',')]
-    for _ in range(len(record)+1, 2020):
-        delta = list(reversed(record)).index(last_spoken) + 1 if last_spoken in record else 0
-        record.append(last_spoken)
-        last_spoken = delta
-    return last_spoken
+    import array
+
+    def get_spoken(numbers, n, state=None):
+        if state is None and n < len(numbers):
+            return numbers[n-1], None
+        if state is None:
+            last_seen = array.array('I', [0]) * max(n, max(numbers)+1)
+            for turn, number in enumerate(numbers[:-1], 1):
+                last_seen[number] = turn
+            state = len(numbers), numbers[-1], last_seen
+        start, spoken, last_seen = state
+        if n < start:
+            raise ValueError(f'Game is already at turn {start}, cannot go back to {n}.')
+        if len(last_seen) < n:
+            last_seen.extend(array.array('I', [0]) * (n - len(last_seen)))
+        for turn in range(start, n):
+            seen = last_seen[spoken]
+            last_seen[spoken] = turn
+            spoken = turn - seen if seen else 0
+        return spoken, (n, spoken, last_seen)
+
+    spoken, _ = get_spoken([int(a) for a in lines[0].split(',')], 2020)
+    return spoken
 
 
 def problem_15_b(lines):
     '''Given your starting numbers, what will be the 30000000th number spoken? 175594'''
-    *record, last_spoken = [int(a) for a in lines[0].split(',')]
-    record = {a: record.index(a)+1 for a in record}
-    for i in range(len(record)+1, 30000000):
-        delta = i - record[last_spoken] if last_spoken in record else 0
-        record[last_spoken] = i
-        last_spoken = delta
-    return last_spoken
+    import array
+
+    def get_spoken(numbers, n, state=None):
+        if state is None and n < len(numbers):
+            return numbers[n-1], None
+        if state is None:
+            last_seen = array.array('I', [0]) * max(n, max(numbers)+1)
+            for turn, number in enumerate(numbers[:-1], 1):
+                last_seen[number] = turn
+            state = len(numbers), numbers[-1], last_seen
+        start, spoken, last_seen = state
+        if n < start:
+            raise ValueError(f'Game is already at turn {start}, cannot go back to {n}.')
+        if len(last_seen) < n:
+            last_seen.extend(array.array('I', [0]) * (n - len(last_seen)))
+        for turn in range(start, n):
+            seen = last_seen[spoken]
+            last_seen[spoken] = turn
+            spoken = turn - seen if seen else 0
+        return spoken, (n, spoken, last_seen)
+
+    spoken, _ = get_spoken([int(a) for a in lines[0].split(',')], 30000000)
+    return spoken
 
 
 ###
@@ -810,59 +1132,124 @@ nearby tickets:
 def problem_16_a(lines):
     '''Consider the validity of the nearby tickets you scanned. What is your ticket scanning
     error rate? 71'''
-    def get_valid_ranges(field):
-        for range_ in field.split(': ')[1].split(' or '):
-            start, stop = [int(a) for a in range_.split('-')]
-            yield range(start, stop+1)
+    import bisect
+
+    def get_index(fields):
+        rules = [get_rule(field) for field in fields]
+        points = sorted({a for _, ranges in rules for start, stop in ranges
+                             for a in (start, stop+1)})
+        masks = [0] * len(points)
+        for i, (_, ranges) in enumerate(rules):
+            for start, stop in ranges:
+                for j in range(bisect.bisect(points, start)-1, bisect.bisect(points, stop)):
+                    masks[j] |= 1 << i
+        return [name for name, _ in rules], (points, masks)
+
+    def get_rule(field):
+        name, ranges = field.split(': ')
+        return name, [[int(a) for a in range_.split('-')] for range_ in ranges.split(' or ')]
+
+    def get_fields_mask(index, value):
+        points, masks = index
+        i = bisect.bisect(points, value) - 1
+        return masks[i] if i >= 0 else 0
 
     fields, _, nerby_tickets = [a.split('\r') for a in '\r'.join(lines).split('\r\r')]
-    valid_ranges = [range_ for f in fields for range_ in get_valid_ranges(f)]
-    is_valid = lambda value: any(value in a for a in valid_ranges)
+    _, index = get_index(fields)
     values = [int(a) for a in ','.join(nerby_tickets[1:]).split(',')]
-    return sum(a for a in values if not is_valid(a))
+    return sum(a for a in values if not get_fields_mask(index, a))
 
 
 def problem_16_b(lines):
     '''Once you work out which field is which, look for the six fields on your ticket that
     start with the word departure. What do you get if you multiply those six values
     together? 14'''
-    import functools, operator as op, re
+    import bisect, functools, operator as op
 
     def main():
         fields, your_ticket, nerby_tickets = \
             [a.split('\r') for a in '\r'.join(lines).split('\r\r')]
-        field_values = get_field_values(fields)
-        tickets = get_valid_tickets(field_values, your_ticket[1:] + nerby_tickets[1:])
-        out = {i: set(field_values.keys()) for i in range(len(tickets[0]))}
-        purge_solutions(out, field_values, tickets)
-        while any(len(fields) > 1 for fields in out.values()):
-            remove_solved_fields(out)
-        indices = [i for i, fields in out.items() if 'departure' in next(iter(fields))]
+        names, index = get_index(fields)
+        tickets = [[int(a) for a in t.split(',')] for t in your_ticket[1:] + nerby_tickets[1:]]
+        tickets_masks = [[get_fields_mask(index, a) for a in t] for t in tickets]
+        column_masks = functools.reduce(lambda out, masks: [a & b for a, b in zip(out, masks)],
+                                        (masks for masks in tickets_masks if all(masks)))
+        fields_by_column = get_assignment(dict(enumerate(column_masks)))
+        indices = [i for i, field in fields_by_column.items() if 'departure' in names[field]]
         return functools.reduce(op.mul, (tickets[0][i] for i in indices))
 
-    def get_field_values(fields):
-        def get_item(field):
-            name, a, b, c, d = re.match('^(.*): (\d+)-(\d+) or (\d+)-(\d+)', field).groups()
-            return name, set(range(int(a), int(b)+1)) | set(range(int(c), int(d)+1))
-        return dict(get_item(field) for field in fields)
-
-    def get_valid_tickets(field_values, tickets):
-        valid_values = functools.reduce(op.or_, field_values.values())
-        tickets = [[int(a) for a in t.split(',')] for t in tickets]
-        return tuple(t for t in tickets if set(t) <= valid_values)
-
-    def purge_solutions(out, field_values, tickets):
-        get_column = lambda i: [a[i] for a in tickets]
-        for col_index in range(len(tickets[0])):
-            for val in get_column(col_index):
-                for field_name, values in field_values.items():
-                    if val not in values:
-                        out[col_index] -= {field_name}
-
-    def remove_solved_fields(out):
-        solved_fields = {next(iter(fields)) for fields in out.values() if len(fields) == 1}
-        for possible_fields in out.values():
-            possible_fields -= solved_fields if len(possible_fields) > 1 else set()
+    def get_index(fields):
+        rules = [get_rule(field) for field in fields]
+        points = sorted({a for _, ranges in rules for start, stop in ranges
+                             for a in (start, stop+1)})
+        masks = [0] * len(points)
+        for i, (_, ranges) in enumerate(rules):
+            for start, stop in ranges:
+                for j in range(bisect.bisect(points, start)-1, bisect.bisect(points, stop)):
+                    masks[j] |= 1 << i
+        return [name for name, _ in rules], (points, masks)
+
+    def get_rule(field):
+        name, ranges = field.split(': ')
+        return name, [[int(a) for a in range_.split('-')] for range_ in ranges.split(' or ')]
+
+    def get_fields_mask(index, value):
+        points, masks = index
+        i = bisect.bisect(points, value) - 1
+        return masks[i] if i >= 0 else 0
+
+    def get_assignment(masks):
+        out = {}
+        while True:
+            solved = [(column, mask) for column, mask in masks.items() if is_single(mask)]
+            if not solved:
+                break
+            for column, mask in solved:
+                out[column] = mask.bit_length() - 1
+                del masks[column]
+                for other in masks:
+                    masks[other] &= ~mask
+        out.update(get_matching(masks))
+        return out
+
+    def is_single(mask):
+        return mask and not mask & (mask - 1)
+
+    def get_bits(mask):
+        while mask:
+            bit = mask & -mask
+            yield bit.bit_length() - 1
+            mask ^= bit
+
+    def get_matching(masks):
+        field_by_column, column_by_field = {}, {}
+        while True:
+            layers = {column: 0 for column in masks if column not in field_by_column}
+            queue, found_free_field = list(layers), False
+            for column in queue:
+                for field in get_bits(masks[column]):
+                    matched_column = column_by_field.get(field)
+                    if matched_column is None:
+                        found_free_field = True
+                    elif matched_column not in layers:
+                        layers[matched_column] = layers[column] + 1
+                        queue.append(matched_column)
+            if not found_free_field:
+                return field_by_column
+            for column in masks:
+                if column not in field_by_column and layers[column] is not None:
+                    augment(column, masks, layers, field_by_column, column_by_field)
+
+    def augment(column, masks, layers, field_by_column, column_by_field):
+        for field in get_bits(masks[column]):
+            matched_column = column_by_field.get(field)
+            if matched_column is None or (layers.get(matched_column) == layers[column] + 1
+                    and augment(matched_column, masks, layers, field_by_column,
+                                column_by_field)):
+                field_by_column[column], column_by_field[field] = field, column
+                return True
+        layers[column] = None
+        return False
 
     return main()
 
@@ -881,46 +1268,50 @@ def problem_17_a(lines):
     '''Starting with your given initial configuration, simulate six cycles. How many cubes are
     left in the active state after the sixth cycle? 112'''
     import collections, itertools
-    P = collections.namedtuple('P', 'x y z')
 
-    def get_neighbours(p):
-        DELTAS = set(itertools.product([-1, 0, 1], repeat=3)) - {(0, 0, 0)}
-        return {P(p.x + dx, p.y + dy, p.z + dz) for dx, dy, dz in DELTAS}
+    def simulate(lines, n_dims, n_cycles):
+        cubes = {(x, y) + (0,) * (n_dims-2) for y, line in enumerate(lines)
+                     for x, ch in enumerate(line) if ch == '#'}
+        deltas = [a for a in itertools.product([-1, 0, 1], repeat=n_dims) if any(a)]
+        for _ in range(n_cycles):
+            counter = collections.Counter()
+            for cube in cubes:
+                for delta in deltas:
+                    neighbour = tuple(a + b for a, b in zip(cube, delta))
+                    if all(a >= 0 for a in neighbour[2:]):
+                        counter[neighbour] += get_weight(cube, neighbour)
+            cubes = {p for p, n in counter.items() if n == 3 or (n == 2 and p in cubes)}
+        return sum(1 << sum(a != 0 for a in cube[2:]) for cube in cubes)
 
-    def should_be_active(p):
-        n_active_neighbours = len(get_neighbours(p) & cubes)
-        return (p in cubes and 2 <= n_active_neighbours <= 3) or \
-               (p not in cubes and n_active_neighbours == 3)
+    def get_weight(cube, neighbour):
+        return 1 << sum(a == 1 and b == 0 for a, b in zip(cube[2:], neighbour[2:]))
 
-    cubes = {P(x, y, 0) for y, line in enumerate(lines)
-                            for x, ch in enumerate(line) if ch == '#'}
-    for _ in range(6):
-        candidates = {p for cube in cubes for p in get_neighbours(cube)}
-        cubes = {p for p in candidates if should_be_active(p)}
-    return len(cubes)
+    return simulate(lines, n_dims=3, n_cycles=6)
 
 
 def problem_17_b(lines):
     '''Starting with your given initial configuration, simulate six cycles in a 4-dimensional
     space. How many cubes are left in the active state after the sixth cycle? 848'''
     import collections, itertools
-    P = collections.namedtuple('P', 'x y z w')
 
-    def get_neighbours(p):
-        DELTAS = set(itertools.product([-1, 0, 1], repeat=4)) - {(0, 0, 0, 0)}
-        return {P(p.x+dx, p.y+dy, p.z+dz, p.w+dw) for dx, dy, dz, dw in DELTAS}
+    def simulate(lines, n_dims, n_cycles):
+        cubes = {(x, y) + (0,) * (n_dims-2) for y, line in enumerate(lines)
+                     for x, ch in enumerate(line) if ch == '#'}
+        deltas = [a for a in itertools.product([-1, 0, 1], repeat=n_dims) if any(a)]
+        for _ in range(n_cycles):
+            counter = collections.Counter()
+            for cube in cubes:
+                for delta in deltas:
+                    neighbour = tuple(a + b for a, b in zip(cube, delta))
+                    if all(a >= 0 for a in neighbour[2:]):
+                        counter[neighbour] += get_weight(cube, neighbour)
+            cubes = {p for p, n in counter.items() if n == 3 or (n == 2 and p in cubes)}
+        return sum(1 << sum(a != 0 for a in cube[2:]) for cube in cubes)
 
-    def should_be_active(p):
-        n_active_neighbours = len(get_neighbours(p) & cubes)
-        return (p in cubes and 2 <= n_active_neighbours <= 3) or \
-               (p not in cubes and n_active_neighbours == 3)
+    def get_weight(cube, neighbour):
+        return 1 << sum(a == 1 and b == 0 for a, b in zip(cube[2:], neighbour[2:]))
 
-    cubes = {P(x, y, 0, 0) for y, line in enumerate(lines)
-                               for x, ch in enumerate(line) if ch == '#'}
-    for _ in range(6):
-        candidates = {p for cube in cubes for p in get_neighbours(cube)}
-        cubes = {p for p in candidates if should_be_active(p)}
-    return len(cubes)
+    return simulate(lines, n_dims=4, n_cycles=6)
 
 
 ###
@@ -934,40 +1325,73 @@ IN_18 = \
 def problem_18_a(lines):
     '''Before you can help with the homework, you need to understand it yourself. Evaluate the
     expression on each line of the homework; what is the sum of the resulting values? 437'''
-    import operator as op, re
-
-    def calculate_line(line):
-        while '(' in line:
-            line = re.sub('\(([^()]*?)\)', lambda m: calculate(m.group(1)), line)    
-        return int(calculate(line))
-
-    def calculate(s):
-        out, op_ = 0, op.add
-        for el in s.split():
-            if el.isdigit():
-                out = op_(out, int(el))
+    import functools, operator as op, re
+    PRECEDENCE = {'+': 1, '*': 1}
+    OPERATIONS = {'+': op.add, '*': op.mul}
+    TOKEN = re.compile('\d+|\S')
+
+    @functools.lru_cache(maxsize=2**16)
+    def evaluate(line):
+        values, operators = [], []
+        for token in TOKEN.findall(line):
+            if token.isdigit():
+                values.append(int(token))
+            elif token == '(':
+                operators.append(token)
+            elif token == ')':
+                while operators[-1] != '(':
+                    apply(values, operators.pop())
+                operators.pop()
             else:
-                op_ = op.add if el == '+' else op.mul 
-        return str(out)    
+                while operators and operators[-1] != '(' and \
+                        PRECEDENCE[operators[-1]] >= PRECEDENCE[token]:
+                    apply(values, operators.pop())
+                operators.append(token)
+        while operators:
+            apply(values, operators.pop())
+        return values[0]
 
-    return sum(calculate_line(line) for line in lines)
+    def apply(values, operator):
+        right_value = values.pop()
+        values[-1] = OPERATIONS[operator](values[-1], right_value)
+
+    return sum(evaluate(line) for line in lines)
 
 
 def problem_18_b(lines):
     '''What do you get if you add up the results of evaluating the homework problems using
     these new rules? 1445'''
-    import operator as op, re
+    import functools, operator as op, re
+    PRECEDENCE = {'+': 2, '*': 1}
+    OPERATIONS = {'+': op.add, '*': op.mul}
+    TOKEN = re.compile('\d+|\S')
+
+    @functools.lru_cache(maxsize=2**16)
+    def evaluate(line):
+        values, operators = [], []
+        for token in TOKEN.findall(line):
+            if token.isdigit():
+                values.append(int(token))
+            elif token == '(':
+                operators.append(token)
+            elif token == ')':
+                while operators[-1] != '(':
+                    apply(values, operators.pop())
+                operators.pop()
+            else:
+                while operators and operators[-1] != '(' and \
+                        PRECEDENCE[operators[-1]] >= PRECEDENCE[token]:
+                    apply(values, operators.pop())
+                operators.append(token)
+        while operators:
+            apply(values, operators.pop())
+        return values[0]
 
-    def calculate(s):
-        while '(' in s:
-            s = re.sub('\(([^()]*?)\)', lambda m: calculate(m.group(1)), s)
-        while '+' in s:
-            s = re.sub('(\d+) \+ (\d+)', lambda m: str(int(m.group(1)) + int(m.group(2))), s)
-        while '*' in s:
-            s = re.sub('(\d+) \* (\d+)', lambda m: str(int(m.group(1)) * int(m.group(2))), s)
-        return s
+    def apply(values, operator):
+        right_value = values.pop()
+        values[-1] = OPERATIONS[operator](values[-1], right_value)
 
-    return sum(int(calculate(line)) for line in lines)
+    return sum(evaluate(line) for line in lines)
 
 
 ###
@@ -1026,60 +1450,74 @@ aabbbbbaabbbaaaaaabbbbbababaaaaabbaaabba'''
 
 def problem_19_a(lines):
     '''How many messages completely match rule 0? 3'''
-    def parse_rule(line):
-        id_, value = line.split(': ')
-        if '"' in value:
-            return id_, value.strip('"')
-        return id_, [a.split() for a in value.split('|')]
-
-    def is_valid(message, so_far, rule_id):
-        subrules = rules[rule_id]
-        if type(subrules) == str:
-            return so_far + subrules if message.startswith(so_far + subrules) else False
-        elif len(subrules) == 1:
-            tmp = so_far
-            for subrule in subrules[0]:
-                tmp = is_valid(message, tmp, subrule)
-                if tmp == False:
-                    return False
-            return message == tmp if rule_id == '0' else tmp
-        else:
-            for s in subrules:
-                tmp = so_far
-                for subrule in s:
-                    tmp = is_valid(message, tmp, subrule)
-                    if tmp == False:
-                        break
-                if tmp:
-                    return tmp
-            return False
+    import re
+
+    def compile_grammar(rule_lines):
+        rules = dict(line.split(': ') for line in rule_lines)
+        patterns = {}
+
+        def get_pattern(rule_id):
+            if rule_id not in patterns:
+                rule = rules[rule_id]
+                if '"' in rule:
+                    patterns[rule_id] = re.escape(rule.strip('"'))
+                else:
+                    get_sequence = lambda seq: ''.join(get_pattern(a) for a in seq.split())
+                    alternatives = '|'.join(get_sequence(a) for a in rule.split('|'))
+                    patterns[rule_id] = f'(?:{alternatives})'
+            return patterns[rule_id]
+
+        return re.compile(get_pattern('0'))
 
     rule_lines, messages = [a.split('\r') for a in '\r'.join(lines).split('\r\r')]
-    rules = dict(parse_rule(l) for l in rule_lines)
-    return sum(is_valid(m, '', '0') for m in messages)
+    grammar = compile_grammar(rule_lines)
+    return sum(grammar.fullmatch(m) is not None for m in messages)
 
 
 def problem_19_b(lines):
     '''After updating rules 8 and 11, how many messages completely match rule 0? 12'''
+    import collections
+
     def parse_rule(line):
         id_, value = line.split(': ')
         if '"' in value:
-            return int(id_), value
-        return int(id_), [[int(a) for a in v.split()] for v in value.split('|')]
-
-    def is_valid(message, seq):
-        if message == '' or seq == []:
-            return message == '' and seq == []
-        rule = rules[seq[0]]
-        if '"' in rule:
-            return is_valid(message[1:], seq[1:]) if message[0] in rule else False
-        else:
-            return any(is_valid(message, r + seq[1:]) for r in rule)
+            return int(id_), value.strip('"')
+        return int(id_), [tuple(int(a) for a in v.split()) for v in value.split('|')]
+
+    def is_valid(message, rules, start_rule):
+        chart = [[] for _ in range(len(message)+1)]
+        seen = [set() for _ in range(len(message)+1)]
+        waiting = [collections.defaultdict(list) for _ in range(len(message)+1)]
+
+        def add(i, item):
+            if item not in seen[i]:
+                seen[i].add(item)
+                chart[i].append(item)
+
+        for alt in range(len(rules[start_rule])):
+            add(0, (start_rule, alt, 0, 0))
+        for i, items in enumerate(chart):
+            for rule_id, alt, dot, origin in items:
+                seq = rules[rule_id][alt]
+                if dot == len(seq):
+                    for r, a, d, o in waiting[origin][rule_id]:
+                        add(i, (r, a, d+1, o))
+                    continue
+                subrule = rules[seq[dot]]
+                if type(subrule) == str:
+                    if message.startswith(subrule, i):
+                        add(i + len(subrule), (rule_id, alt, dot+1, origin))
+                    continue
+                waiting[i][seq[dot]].append((rule_id, alt, dot, origin))
+                for sub_alt in range(len(subrule)):
+                    add(i, (seq[dot], sub_alt, 0, i))
+        return any((start_rule, alt, len(seq), 0) in seen[-1]
+                       for alt, seq in enumerate(rules[start_rule]))
 
     rule_lines, messages = [a.split('\r') for a in '\r'.join(lines).split('\r\r')]
     rule_lines += ['8: 42 | 42 8', '11: 42 31 | 42 11 31']
     rules = dict(parse_rule(l) for l in rule_lines)
-    return sum(is_valid(m, [0]) for m in messages)
+    return sum(is_valid(m, rules, 0) for m in messages)
 
 
 ###